@@ -0,0 +1,210 @@
+# admission.py
+"""
+Admission control and load shedding.
+
+Requests are classified into route classes (read, write, search, bulk). Each
+class has its own concurrency limit with a bounded FIFO wait queue and a
+per-client token bucket. A request is rejected up front instead of being
+left to queue when:
+
+- the client is over its rate for the class (429),
+- the class queue is full, or the estimated queue wait exceeds the class
+  wait budget (503),
+- it is a search while reads are queueing, so cheap reads keep priority
+  over model inference (503).
+
+Rejections carry a Retry-After header. Set ADMISSION_CONTROL=0 to disable.
+Behind proxies that append to X-Forwarded-For, set TRUSTED_PROXY_HOPS to
+the number of them so clients are told apart by their real address.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1") != "0"
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", 0))
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded FIFO queue and a wait budget"""
+
+    def __init__(self, limit: int, max_queue: int, max_wait: float, initial_service_time: float = 0.05):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters = deque()
+        # Moving average of how long a request holds its slot
+        self.service_time = initial_service_time
+
+    def estimated_wait(self) -> float:
+        """Expected queueing delay for a request arriving now"""
+        if self.active < self.limit and not self.waiters:
+            return 0.0
+        return (len(self.waiters) + 1) * self.service_time / self.limit
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.estimated_wait()))
+
+    async def acquire(self) -> Optional[int]:
+        """Take a slot; returns None on success or a Retry-After in seconds"""
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return None
+
+        if len(self.waiters) >= self.max_queue or self.estimated_wait() > self.max_wait:
+            return self.retry_after()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            # Client went away while queued; hand back a slot it was given
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self.waiters.remove(waiter)
+            raise
+
+        if waiter.done():
+            return None
+        self.waiters.remove(waiter)
+        waiter.cancel()
+        return self.retry_after()
+
+    def release(self, service_time: Optional[float] = None):
+        """Free a slot, handing it straight to the next queued request"""
+        if service_time is not None:
+            self.service_time = 0.9 * self.service_time + 0.1 * service_time
+
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+class TokenBucketLimiter:
+    """Per-client token buckets (rate tokens/second, up to burst)
+
+    At most max_clients buckets are kept; the least recently seen client is
+    forgotten first.
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def consume(self, client: str) -> Optional[int]:
+        """Spend one token; returns None if allowed or a Retry-After in seconds"""
+        now = time.monotonic()
+        tokens, last = self.buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+
+        allowed = tokens >= 1
+        # Re-inserted at the end, so the dict stays ordered by last seen
+        self.buckets[client] = [tokens - 1 if allowed else tokens, now]
+        if len(self.buckets) > self.max_clients:
+            self.buckets.popitem(last=False)
+
+        if not allowed:
+            return max(1, math.ceil((1 - tokens) / self.rate))
+        return None
+
+class RoutePolicy:
+    def __init__(self, limit: int, max_queue: int, max_wait: float, rate: float, burst: int):
+        self.limiter = ConcurrencyLimiter(limit, max_queue, max_wait)
+        self.rate_limiter = TokenBucketLimiter(rate, burst)
+
+def default_policies() -> Dict[str, RoutePolicy]:
+    return {
+        "read": RoutePolicy(limit=16, max_queue=64, max_wait=0.5, rate=50, burst=100),
+        # SQLite has a single writer, so queue writes instead of contending
+        "write": RoutePolicy(limit=1, max_queue=32, max_wait=1.0, rate=10, burst=20),
+        "search": RoutePolicy(limit=2, max_queue=8, max_wait=1.0, rate=2, burst=5),
+        "bulk": RoutePolicy(limit=1, max_queue=0, max_wait=0.0, rate=0.2, burst=5),
+    }
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class for a request, or None to bypass admission control"""
+    if method == "OPTIONS" or not path.startswith("/api/"):
+        return None
+    if path == "/api/notes/search":
+        return "search"
+    if path == "/api/notes/export" or path == "/api/notes/import":
+        return "bulk"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+def client_key(scope) -> str:
+    """Client address for rate limiting
+
+    With TRUSTED_PROXY_HOPS=n, the address the outermost of n proxies saw,
+    i.e. the n-th X-Forwarded-For entry from the right. Entries left of it
+    are written by the client and are never used. Otherwise the address of
+    the connection.
+    """
+    if TRUSTED_PROXY_HOPS:
+        hops = []
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                hops.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying per-route-class admission policies"""
+
+    def __init__(self, app, policies: Optional[Dict[str, RoutePolicy]] = None):
+        self.app = app
+        self.policies = policies or default_policies()
+
+    async def reject(self, send, status: int, retry_after: int, detail: str):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        route_class = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policies[route_class]
+        retry_after = policy.rate_limiter.consume(client_key(scope))
+        if retry_after is not None:
+            await self.reject(send, 429, retry_after, "Rate limit exceeded, slow down")
+            return
+
+        read_limiter = self.policies["read"].limiter
+        if route_class == "search" and read_limiter.waiters:
+            await self.reject(send, 503, read_limiter.retry_after(), "Server busy, search temporarily shed")
+            return
+
+        retry_after = await policy.limiter.acquire()
+        if retry_after is not None:
+            await self.reject(send, 503, retry_after, "Server busy, please retry")
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            policy.limiter.release(time.perf_counter() - start)
@@ -0,0 +1,81 @@
+"""
+Benchmark bulk import and export against a running server.
+
+Streams N generated notes into POST /api/notes/import, then streams them
+back out of GET /api/notes/export. Pass the server's PID to also sample its
+resident memory while the transfers run.
+
+    uvicorn main:app --port 8000 &
+    python benchmark_bulk.py --notes 1000000 --pid $!
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+import uuid
+
+import aiohttp
+
+BASE_URL = "http://localhost:8000"
+
+def read_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+async def sample_rss(pid: int, samples: list, done: asyncio.Event):
+    while not done.is_set():
+        samples.append(read_rss_mb(pid))
+        await asyncio.sleep(0.2)
+
+async def generate_notes(count: int, batch: int = 10000):
+    for start in range(0, count, batch):
+        lines = (json.dumps({"content": f"Bulk note {i}: meeting notes and project planning"}) + "\n"
+                 for i in range(start, min(start + batch, count)))
+        yield "".join(lines).encode()
+
+async def measure(label: str, pid: int, coro):
+    samples, done = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, samples, done)) if pid else None
+    start = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - start
+    done.set()
+    if sampler:
+        await sampler
+    memory = f"  server RSS {min(samples):.0f}-{max(samples):.0f} MiB" if samples else ""
+    print(f"{label:<8} {elapsed:7.1f} s{memory}  {result}")
+
+async def run(count: int, pid: int, compress: bool):
+    print(f"📦 {count} notes, gzip={compress}")
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async def do_import():
+            async with session.post(f"{BASE_URL}/api/notes/import",
+                                    params={"import_id": f"bench-{uuid.uuid4().hex[:8]}"},
+                                    data=generate_notes(count)) as resp:
+                return await resp.json()
+
+        async def do_export():
+            lines, size = 0, 0
+            decompressor = gzip.zlib.decompressobj(wbits=31) if compress else None
+            async with session.get(f"{BASE_URL}/api/notes/export",
+                                   params={"gzip": str(compress).lower()}) as resp:
+                async for chunk in resp.content.iter_chunked(1 << 16):
+                    size += len(chunk)
+                    lines += (decompressor.decompress(chunk) if decompressor else chunk).count(b"\n")
+            return {"lines": lines, "bytes": size}
+
+        await measure("import", pid, do_import())
+        await measure("export", pid, do_export())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import/export benchmark")
+    parser.add_argument("--notes", type=int, default=1000000)
+    parser.add_argument("--pid", type=int, help="server PID, to sample its memory")
+    parser.add_argument("--gzip", action="store_true", help="export gzip-compressed")
+    args = parser.parse_args()
+    asyncio.run(run(args.notes, args.pid, args.gzip))
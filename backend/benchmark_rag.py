@@ -0,0 +1,105 @@
+"""
+Benchmarks for the RAG service.
+
+Quantized storage against the dense float32 baseline, using synthetic
+clustered unit vectors shaped like all-MiniLM-L6-v2 output (no model
+download needed). Reports memory, QPS and recall@k:
+
+    python benchmark_rag.py --chunks 1000000 --queries 200
+
+Search cache, replaying a query log (one query per line) through
+SimpleRAG.search_notes with and without caching:
+
+    python benchmark_rag.py --replay queries.log --db ./notes.db
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from rag_service import QuantizedEmbeddings, SimpleRAG
+
+DIM = 384
+
+def make_vectors(n: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """Unit vectors grouped around random centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((n_clusters, DIM)).astype(np.float32)
+    vectors = np.empty((n, DIM), dtype=np.float32)
+    for start in range(0, n, 65536):
+        stop = min(start + 65536, n)
+        labels = rng.integers(0, n_clusters, stop - start)
+        block = centroids[labels] + 0.8 * rng.standard_normal((stop - start, DIM)).astype(np.float32)
+        vectors[start:stop] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+def baseline_search(embeddings: np.ndarray, query: np.ndarray, top_k: int) -> np.ndarray:
+    """Same scoring as SimpleRAG without quantization"""
+    similarities = cosine_similarity(query.reshape(1, -1), embeddings)[0]
+    return np.argsort(similarities)[::-1][:top_k]
+
+def run(chunks: int, queries: int, top_k: int):
+    print(f"📊 {chunks} chunks x {DIM} dims, {queries} queries, top_k={top_k}")
+    embeddings = make_vectors(chunks)
+    query_vectors = make_vectors(queries, seed=1)
+
+    start = time.perf_counter()
+    truth = [baseline_search(embeddings, q, top_k) for q in query_vectors]
+    elapsed = time.perf_counter() - start
+    print(f"float32              {embeddings.nbytes / 2**20:9.1f} MiB  {queries / elapsed:8.1f} QPS  recall@{top_k} 1.000")
+
+    cases = [(dtype, rescore, False) for dtype in ('int8', 'float16') for rescore in (False, True)]
+    # Vectors arriving one at a time, as with add_note_to_vector_store on an empty index
+    cases += [('int8', rescore, True) for rescore in (False, True)]
+
+    for dtype, rescore, incremental in cases:
+        store = QuantizedEmbeddings(DIM, dtype, rescore=rescore)
+        if incremental:
+            for i in range(min(1000, chunks)):
+                store.add(embeddings[i:i + 1])
+            for start in range(1000, chunks, 1024):
+                store.add(embeddings[start:start + 1024])
+        else:
+            store.add(embeddings)
+
+        start = time.perf_counter()
+        found = [store.search(q, top_k)[0] for q in query_vectors]
+        elapsed = time.perf_counter() - start
+
+        recall = np.mean([len(set(f) & set(t)) / top_k for f, t in zip(found, truth)])
+        label = f"{dtype}{'+rescore' if rescore else ''}{' incr' if incremental else ''}"
+        print(f"{label:<21}{store.nbytes / 2**20:9.1f} MiB  {queries / elapsed:8.1f} QPS  recall@{top_k} {recall:.3f}")
+
+def replay(log_path: str, db_path: str, top_k: int):
+    with open(log_path) as f:
+        queries = [line.strip() for line in f if line.strip()]
+    print(f"🔁 Replaying {len(queries)} queries against {db_path}")
+
+    for cache_size in (0, 1024):
+        rag = SimpleRAG(db_path, cache_size=cache_size)
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            rag.search_notes(query, top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        p50, p99 = np.percentile(latencies, [50, 99])
+        stats = rag.cache_stats()
+        print(f"cache_size={cache_size:<5} mean {np.mean(latencies):7.2f} ms  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+              f"embedding hit rate {stats['embeddings']['hit_rate']:.2f}  "
+              f"result hit rate {stats['results']['hit_rate']:.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG service benchmarks")
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--replay", help="query log to replay through the search cache")
+    parser.add_argument("--db", default="./notes.db")
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay, args.db, args.top_k)
+    else:
+        run(args.chunks, args.queries, args.top_k)
@@ -0,0 +1,102 @@
+"""
+Open-loop load test for admission control.
+
+Sends a mix of reads, writes and searches at a fixed arrival rate, spread
+over many virtual clients, and reports status counts and latency
+percentiles per route class. Run once near capacity and once at 10x to see
+that shedding keeps latency bounded (compare with ADMISSION_CONTROL=0).
+
+Virtual clients are told apart by X-Forwarded-For, so start the server
+with TRUSTED_PROXY_HOPS=1 (the load test plays the one trusted proxy).
+Without it every request lands in one client's rate limit bucket.
+
+    TRUSTED_PROXY_HOPS=1 uvicorn main:app --port 8000
+    python load_test.py --rps 50 --duration 20
+    python load_test.py --rps 500 --duration 20
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+
+import aiohttp
+
+BASE_URL = "http://localhost:8000"
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+async def seed_notes(session, count: int = 20):
+    note_ids = []
+    for i in range(count):
+        async with session.post(f"{BASE_URL}/api/notes", json={"content": f"Load test note {i}"}) as resp:
+            if resp.status == 200:
+                note_ids.append((await resp.json())["id"])
+    return note_ids
+
+async def send_request(session, route_class: str, note_ids, client: str, results):
+    headers = {"X-Forwarded-For": client}
+    note_id = random.choice(note_ids)
+    start = time.perf_counter()
+    try:
+        if route_class == "read":
+            request = session.get(f"{BASE_URL}/api/notes/{note_id}", headers=headers)
+        elif route_class == "write":
+            request = session.put(f"{BASE_URL}/api/notes/{note_id}/simple", headers=headers,
+                                  json={"content": f"Updated at {time.time()}"})
+        else:
+            request = session.post(f"{BASE_URL}/api/notes/search", headers=headers,
+                                   json={"query": "meeting notes", "top_k": 3})
+        async with request as resp:
+            await resp.read()
+            status = resp.status
+    except asyncio.TimeoutError:
+        status = "timeout"
+    except aiohttp.ClientError:
+        status = "error"
+    results[route_class].append((status, (time.perf_counter() - start) * 1000))
+
+async def run(rps: float, duration: float, clients: int, mix):
+    results = defaultdict(list)
+    connector = aiohttp.TCPConnector(limit=2000)
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        note_ids = await seed_notes(session)
+        if not note_ids:
+            print("❌ Could not create seed notes (is the server running?)")
+            return
+
+        print(f"🚀 {rps} req/s for {duration}s across {clients} clients")
+        classes, weights = zip(*mix.items())
+        tasks = []
+        start = time.perf_counter()
+        for i in range(int(rps * duration)):
+            # Open loop: arrivals follow the schedule regardless of responses
+            delay = start + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            route_class = random.choices(classes, weights)[0]
+            client = f"10.0.{random.randrange(clients) // 256}.{random.randrange(clients) % 256}"
+            tasks.append(asyncio.create_task(send_request(session, route_class, note_ids, client, results)))
+        await asyncio.gather(*tasks)
+
+    for route_class in classes:
+        entries = results[route_class]
+        statuses = Counter(status for status, _ in entries)
+        ok = [latency for status, latency in entries if status == 200]
+        every = [latency for _, latency in entries]
+        print(f"{route_class:<7} sent {len(entries):6d}  statuses {dict(statuses)}")
+        print(f"        200 p50 {percentile(ok, 50):8.1f} ms  p99 {percentile(ok, 99):8.1f} ms   "
+              f"all p99 {percentile(every, 99):8.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Admission control load test")
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--clients", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rps, args.duration, args.clients, {"read": 70, "write": 20, "search": 10}))
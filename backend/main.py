@@ -1,13 +1,25 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, update, delete, select, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker, Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import List, Optional
 import uvicorn
 import os
+import json
+import base64
+import hashlib
+import secrets
+import zlib
+
+from admission import ADMISSION_CONTROL, AdmissionControlMiddleware
+from profiling import ADMIN_TOKEN, ProfileStore, ProfilingMiddleware, SqlTimer, profiling_state
 
 # RAG IMPORT COMMENTED OUT
 # from rag_service import SimpleRAG
@@ -33,9 +45,42 @@ class Note(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     version = Column(Integer, default=1)
 
+# Single-row change counter for the whole notes collection (list ETag)
+class NotesCollection(Base):
+    __tablename__ = "notes_collection"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Progress of resumable bulk imports (one row per client-chosen import id)
+class NoteImport(Base):
+    __tablename__ = "note_imports"
+    
+    id = Column(String, primary_key=True)
+    lines_committed = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Immutable note snapshots behind short share links (content-addressed)
+class NoteShare(Base):
+    __tablename__ = "note_shares"
+    
+    id = Column(String, primary_key=True)
+    content_hash = Column(String, unique=True, nullable=False)
+    note_id = Column(Integer, nullable=False)
+    note_version = Column(Integer, nullable=False)
+    content = Column(Text, nullable=False)
+    note_created_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # Create tables
 Base.metadata.create_all(bind=engine)
 
+with SessionLocal() as _db:
+    if _db.get(NotesCollection, 1) is None:
+        _db.add(NotesCollection(id=1, version=0))
+        _db.commit()
+
 # Pydantic Models - Updated with version support
 class NoteCreate(BaseModel):
     content: str
@@ -45,7 +90,7 @@ class NoteUpdate(BaseModel):
 
 class NoteUpdateWithVersion(BaseModel):
     content: str
-    version: int
+    version: Optional[int] = None  # optional when the If-Match header is sent
 
 class NoteResponse(BaseModel):
     id: int
@@ -61,6 +106,23 @@ class RAGQuery(BaseModel):
     query: str
     top_k: int = 3
 
+class ProfilingSettings(BaseModel):
+    enabled: bool
+    sample_rate: float = Field(0.0, ge=0.0, le=1.0)
+
+class ShareResponse(BaseModel):
+    share_id: str
+    note_id: int
+    version: int
+
+class SharedNoteResponse(BaseModel):
+    share_id: str
+    note_id: int
+    version: int
+    content: str
+    created_at: Optional[datetime]
+    shared_at: datetime
+
 class RAGResponse(BaseModel):
     success: bool
     response: str
@@ -76,6 +138,10 @@ app = FastAPI(
     description="A simple CRUD Notes API with optimistic locking"
 )
 
+# Admission control / load shedding (added before CORS so rejections get CORS headers)
+if ADMISSION_CONTROL:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -90,8 +156,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
 
+# On-demand profiling (only installed when ADMIN_TOKEN is configured)
+profile_store = None
+if ADMIN_TOKEN:
+    profile_store = ProfileStore()
+    app.add_middleware(ProfilingMiddleware, store=profile_store, sql_timer=SqlTimer(engine), token=ADMIN_TOKEN)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -100,6 +173,213 @@ def get_db():
     finally:
         db.close()
 
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard for admin endpoints"""
+    if not ADMIN_TOKEN or not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Conditional request helpers (strong ETags derived from version counters)
+def note_etag(note_id: int, version: int) -> str:
+    return f'"note-{note_id}-v{version}"'
+
+def collection_etag(version: int) -> str:
+    return f'"notes-v{version}"'
+
+def parse_etags(header: str) -> List[str]:
+    """Split an If-Match / If-None-Match header into opaque tags"""
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as required for If-None-Match"""
+    if not if_none_match:
+        return False
+    tags = parse_etags(if_none_match)
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def if_match_versions(if_match: str, note_id: int) -> Optional[List[int]]:
+    """Note versions named by an If-Match header; None means "*" (any version)"""
+    tags = parse_etags(if_match)
+    if "*" in tags:
+        return None
+    
+    # Strong comparison: weak tags and other notes' tags never match
+    prefix = f'"note-{note_id}-v'
+    versions = []
+    for tag in tags:
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            versions.append(int(tag[len(prefix):-1]))
+    return versions
+
+def get_collection_version(db: Session) -> int:
+    return db.query(NotesCollection.version).filter(NotesCollection.id == 1).scalar() or 0
+
+def bump_collection_version(db: Session):
+    """Record a collection change; call inside the write's transaction"""
+    db.execute(
+        update(NotesCollection)
+        .where(NotesCollection.id == 1)
+        .values(version=NotesCollection.version + 1)
+    )
+
+def raise_for_missing_or_stale(db: Session, note_id: int, status_code: int):
+    """Explain why a conditional write matched no rows"""
+    if db.query(Note.id).filter(Note.id == note_id).first() is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if status_code == 412:
+        raise HTTPException(status_code=412, detail="Note has changed since it was fetched (If-Match failed)")
+    raise HTTPException(
+        status_code=409, 
+        detail="Note was modified by another user. Please refresh and try again."
+    )
+
+# Share link helpers
+SHARE_ID_LENGTH = 12
+SHARE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def snapshot_hash(note_id: int, version: int, content: str) -> str:
+    return hashlib.sha256(f"{note_id}:{version}:{content}".encode()).hexdigest()
+
+def share_id_candidates(content_hash: str):
+    """Short URL-safe ids derived from the hash, longest as a collision fallback"""
+    encoded = base64.urlsafe_b64encode(bytes.fromhex(content_hash)).decode().rstrip("=")
+    for length in range(SHARE_ID_LENGTH, len(encoded) + 1, 4):
+        yield encoded[:length]
+
+def share_etag(share_id: str) -> str:
+    return f'"share-{share_id}"'
+
+# Bulk export / import helpers
+EXPORT_BATCH_SIZE = 5000
+IMPORT_BATCH_SIZE = 10000
+MAX_IMPORT_LINE_BYTES = 1 << 20
+INFLATE_PIECE_BYTES = 1 << 16
+
+def note_to_ndjson(row) -> str:
+    return json.dumps({
+        "id": row.id,
+        "content": row.content,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "version": row.version
+    }) + "\n"
+
+def iter_notes_ndjson(compress: bool):
+    """Yield all notes as NDJSON, optionally gzip-compressed
+    
+    Uses keyset pagination with one short read per batch instead of a single
+    long-running cursor, so writers are not locked out during big exports.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    last_id = 0
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(Note.__table__)
+                .where(Note.id > last_id)
+                .order_by(Note.id)
+                .limit(EXPORT_BATCH_SIZE)
+            ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        chunk = "".join(note_to_ndjson(row) for row in rows).encode()
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
+
+def inflate(decompressor, chunk: bytes):
+    """Decompress one upload chunk in bounded pieces, so a small gzip body
+    cannot expand into one huge buffer"""
+    while chunk:
+        yield decompressor.decompress(chunk, INFLATE_PIECE_BYTES)
+        chunk = decompressor.unconsumed_tail
+
+def split_lines(pending: bytearray, data: bytes) -> List[bytes]:
+    """Complete lines in data; the unterminated tail is carried in pending"""
+    lines = []
+    start = 0
+    end = data.find(b"\n")
+    while end != -1:
+        if len(pending) + end - start > MAX_IMPORT_LINE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Import line exceeds {MAX_IMPORT_LINE_BYTES} bytes")
+        if pending:
+            pending += data[start:end]
+            lines.append(bytes(pending))
+            pending.clear()
+        else:
+            lines.append(data[start:end])
+        start = end + 1
+        end = data.find(b"\n", start)
+    if len(pending) + len(data) - start > MAX_IMPORT_LINE_BYTES:
+        raise HTTPException(status_code=413, detail=f"Import line exceeds {MAX_IMPORT_LINE_BYTES} bytes")
+    pending += data[start:]
+    return lines
+
+def parse_import_line(line: bytes, line_number: int, preserve_ids: bool) -> dict:
+    """Validate one NDJSON line into an insertable notes row"""
+    try:
+        data = json.loads(line)
+        content = data["content"].strip()
+        if not content:
+            raise ValueError("content cannot be empty")
+        now = datetime.utcnow()
+        row = {
+            "content": content,
+            "created_at": datetime.fromisoformat(data["created_at"]) if data.get("created_at") else now,
+            "updated_at": datetime.fromisoformat(data["updated_at"]) if data.get("updated_at") else now,
+            "version": int(data.get("version") or 1)
+        }
+        if preserve_ids:
+            row["id"] = int(data["id"])
+        return row
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid note on line {line_number}: {e}")
+
+def write_import_batch(import_id: str, rows: List[dict], lines_committed: int, preserve_ids: bool):
+    """Insert one batch and record progress in the same transaction
+    
+    With preserve_ids an existing note is overwritten and its version moves
+    past both the stored and the imported one, so ETags held by clients
+    for the old content stop matching.
+    """
+    stmt = sqlite_insert(Note.__table__)
+    if preserve_ids:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Note.__table__.c.id],
+            set_={
+                "content": stmt.excluded.content,
+                "created_at": stmt.excluded.created_at,
+                "updated_at": stmt.excluded.updated_at,
+                "version": func.max(Note.__table__.c.version, stmt.excluded.version) + 1
+            }
+        )
+    with engine.begin() as conn:
+        if rows:
+            conn.execute(stmt, rows)
+            bump_collection_version(conn)
+        conn.execute(
+            update(NoteImport)
+            .where(NoteImport.id == import_id)
+            .values(
+                lines_committed=lines_committed,
+                rows_inserted=NoteImport.rows_inserted + len(rows),
+                updated_at=datetime.utcnow()
+            )
+        )
+
+def get_import_progress(import_id: str) -> dict:
+    with SessionLocal() as db:
+        progress = db.get(NoteImport, import_id)
+        if progress is None:
+            progress = NoteImport(id=import_id, lines_committed=0, rows_inserted=0)
+            db.add(progress)
+            db.commit()
+        return {
+            "import_id": progress.id,
+            "lines_committed": progress.lines_committed,
+            "rows_inserted": progress.rows_inserted
+        }
+
 # API Routes
 @app.get("/")
 async def root():
@@ -110,29 +390,128 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 @app.get("/api/notes", response_model=List[NoteResponse])
-async def get_notes(db: Session = Depends(get_db)):
+async def get_notes(response: Response, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     """Get all notes, ordered by creation date (newest first)"""
+    etag = collection_etag(get_collection_version(db))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
     notes = db.query(Note).order_by(Note.created_at.desc()).all()
+    response.headers["ETag"] = etag
     return notes
 
+@app.get("/api/notes/export")
+async def export_notes(gzip: bool = False):
+    """Stream every note as NDJSON (one JSON object per line) in constant memory"""
+    filename = "notes.ndjson.gz" if gzip else "notes.ndjson"
+    return StreamingResponse(
+        iter_notes_ndjson(gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/api/notes/import")
+async def import_notes(request: Request, import_id: str, preserve_ids: bool = False):
+    """Bulk-import NDJSON notes from a streamed upload
+    
+    The body is parsed incrementally (gzip when Content-Encoding: gzip) and
+    inserted in batches, one transaction per batch. Progress is stored under
+    the client-chosen import_id: re-sending the same file with the same
+    import_id skips the lines that were already committed. With
+    preserve_ids=true exported ids are kept and existing notes are
+    overwritten with a bumped version. Lines over MAX_IMPORT_LINE_BYTES are
+    rejected with 413.
+    """
+    progress = await run_in_threadpool(get_import_progress, import_id)
+    skip_lines = progress["lines_committed"]
+    
+    decompressor = None
+    if request.headers.get("content-encoding", "").lower() == "gzip":
+        decompressor = zlib.decompressobj(wbits=47)
+    
+    line_number = 0
+    rows = []
+    pending = bytearray()
+    
+    async def flush():
+        lines_committed = max(line_number, skip_lines)
+        await run_in_threadpool(write_import_batch, import_id, rows, lines_committed, preserve_ids)
+        progress["rows_inserted"] += len(rows)
+        rows.clear()
+    
+    def consume(line: bytes):
+        nonlocal line_number
+        line_number += 1
+        if line_number > skip_lines and line.strip():
+            rows.append(parse_import_line(line, line_number, preserve_ids))
+    
+    async for chunk in request.stream():
+        for data in inflate(decompressor, chunk) if decompressor else (chunk,):
+            for line in split_lines(pending, data):
+                consume(line)
+                if len(rows) >= IMPORT_BATCH_SIZE:
+                    await flush()
+    
+    if decompressor:
+        for line in split_lines(pending, decompressor.flush()):
+            consume(line)
+    if pending:
+        consume(bytes(pending))
+    await flush()
+    
+    # RAG REFRESH COMMENTED OUT
+    # try:
+    #     rag_service.load_notes_to_vector_store()
+    # except Exception as e:
+    #     print(f"Warning: Failed to refresh RAG index: {e}")
+    
+    return {
+        "import_id": import_id,
+        "lines_read": line_number,
+        "lines_skipped": min(skip_lines, line_number),
+        "rows_inserted": progress["rows_inserted"]
+    }
+
+@app.get("/api/notes/import/{import_id}")
+async def get_import_status(import_id: str, db: Session = Depends(get_db)):
+    """Progress of a bulk import (lines committed so far)"""
+    progress = db.get(NoteImport, import_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return {
+        "import_id": progress.id,
+        "lines_committed": progress.lines_committed,
+        "rows_inserted": progress.rows_inserted,
+        "updated_at": progress.updated_at
+    }
+
 @app.get("/api/notes/{note_id}", response_model=NoteResponse)
-async def get_note(note_id: int, db: Session = Depends(get_db)):
+async def get_note(note_id: int, response: Response, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     """Get a specific note by ID"""
+    if if_none_match:
+        # Only the version column is needed to answer a revalidation
+        version = db.query(Note.version).filter(Note.id == note_id).scalar()
+        if version is not None and etag_matches(if_none_match, note_etag(note_id, version)):
+            return Response(status_code=304, headers={"ETag": note_etag(note_id, version)})
+    
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
+    response.headers["ETag"] = note_etag(note.id, note.version)
     return note
 
 @app.post("/api/notes", response_model=NoteResponse)
-async def create_note(note: NoteCreate, db: Session = Depends(get_db)):
+async def create_note(note: NoteCreate, response: Response, db: Session = Depends(get_db)):
     """Create a new note"""
     if not note.content.strip():
         raise HTTPException(status_code=400, detail="Note content cannot be empty")
     
     db_note = Note(content=note.content.strip(), version=1)  # ← Make sure this is explicit
     db.add(db_note)
+    bump_collection_version(db)
     db.commit()
     db.refresh(db_note)
+    response.headers["ETag"] = note_etag(db_note.id, db_note.version)
     
     # RAG FUNCTIONALITY COMMENTED OUT
     # try:
@@ -161,10 +540,8 @@ async def search_notes_rag(query_data: RAGQuery, db: Session = Depends(get_db)):
         "timestamp": datetime.utcnow().isoformat()
     }
     # try:
-    #     # Ensure vector store is up to date
-    #     rag_service.load_notes_to_vector_store()
-    #     
-    #     # Perform RAG search
+    #     # Writes keep the vector store up to date; reloading here would
+    #     # bump the index generation and defeat the search cache
     #     result = rag_service.search_notes(query_data.query, query_data.top_k)
     #     
     #     return result
@@ -199,7 +576,8 @@ async def rag_status():
     #         "status": "active",
     #         "indexed_chunks": doc_count,
     #         "model": "sentence-transformers/all-MiniLM-L6-v2",
-    #         "vector_dimensions": 384
+    #         "vector_dimensions": 384,
+    #         "cache": rag_service.cache_stats()
     #     }
     # except Exception as e:
     #     return {
@@ -207,30 +585,115 @@ async def rag_status():
     #         "error": str(e)
     #     }
 
-# Updated PUT endpoint with version control
-@app.put("/api/notes/{note_id}", response_model=NoteResponse)
-async def update_note(note_id: int, note_update: NoteUpdateWithVersion, db: Session = Depends(get_db)):
-    """Update an existing note with optimistic locking"""
+# Share links (immutable snapshots)
+@app.post("/api/notes/{note_id}/share", response_model=ShareResponse)
+async def share_note(note_id: int, db: Session = Depends(get_db)):
+    """Snapshot a note's current version and return its short share id
+    
+    Identical snapshots (same id, version and content) share one row and id.
+    """
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     
+    content_hash = snapshot_hash(note.id, note.version, note.content)
+    existing = db.query(NoteShare.id).filter(NoteShare.content_hash == content_hash).scalar()
+    if existing:
+        return {"share_id": existing, "note_id": note.id, "version": note.version}
+    
+    snapshot = {
+        "content_hash": content_hash,
+        "note_id": note.id,
+        "note_version": note.version,
+        "content": note.content,
+        "note_created_at": note.created_at
+    }
+    for share_id in share_id_candidates(content_hash):
+        if db.get(NoteShare, share_id) is not None:
+            continue
+        db.add(NoteShare(id=share_id, **snapshot))
+        try:
+            db.commit()
+            break
+        except IntegrityError:
+            # Either a concurrent request stored the same snapshot first, or a
+            # different snapshot took this id; in that case try the next one
+            db.rollback()
+            existing = db.query(NoteShare.id).filter(NoteShare.content_hash == content_hash).scalar()
+            if existing:
+                share_id = existing
+                break
+    else:
+        raise HTTPException(status_code=500, detail="Could not allocate a share id")
+    
+    return {"share_id": share_id, "note_id": snapshot["note_id"], "version": snapshot["note_version"]}
+
+@app.get("/api/share/{share_id}", response_model=SharedNoteResponse)
+async def get_shared_note(share_id: str, response: Response, if_none_match: Optional[str] = Header(None),
+                          db: Session = Depends(get_db)):
+    """Serve a shared snapshot; it never changes, so caches may keep it forever"""
+    etag = share_etag(share_id)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": SHARE_CACHE_CONTROL})
+    
+    share = db.get(NoteShare, share_id)
+    if not share:
+        raise HTTPException(status_code=404, detail="Shared note not found")
+    
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = SHARE_CACHE_CONTROL
+    return {
+        "share_id": share.id,
+        "note_id": share.note_id,
+        "version": share.note_version,
+        "content": share.content,
+        "created_at": share.note_created_at,
+        "shared_at": share.created_at
+    }
+
+# Updated PUT endpoint with version control
+@app.put("/api/notes/{note_id}", response_model=NoteResponse)
+async def update_note(note_id: int, note_update: NoteUpdateWithVersion, response: Response,
+                      if_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Update an existing note with optimistic locking
+    
+    The concurrency token is the If-Match header when present, otherwise the
+    version in the body. It is checked in the UPDATE's WHERE clause, so the
+    check and the write are a single statement.
+    """
     if not note_update.content.strip():
         raise HTTPException(status_code=400, detail="Note content cannot be empty")
     
-    # Optimistic locking check
-    if note.version != note_update.version:
-        raise HTTPException(
-            status_code=409, 
-            detail="Note was modified by another user. Please refresh and try again."
-        )
+    stmt = update(Note).where(Note.id == note_id)
+    if if_match is not None:
+        versions = if_match_versions(if_match, note_id)
+        if versions is not None:
+            stmt = stmt.where(Note.version.in_(versions))
+        failure_status = 412
+    elif note_update.version is not None:
+        stmt = stmt.where(Note.version == note_update.version)
+        failure_status = 409
+    else:
+        raise HTTPException(status_code=428, detail="Send an If-Match header or a version to update this note")
     
-    # Update with version increment
-    note.content = note_update.content.strip()
-    note.version += 1
-    note.updated_at = datetime.utcnow()
+    # Update with version increment; RETURNING hands back the written row
+    # so a concurrent delete after commit cannot leave us without it
+    note = db.scalars(
+        stmt.values(
+            content=note_update.content.strip(),
+            version=Note.version + 1,
+            updated_at=datetime.utcnow()
+        ).returning(Note)
+    ).first()
+    if note is None:
+        db.rollback()
+        raise_for_missing_or_stale(db, note_id, failure_status)
+    
+    # Serialize before commit expires the instance
+    updated = NoteResponse.model_validate(note)
+    bump_collection_version(db)
     db.commit()
-    db.refresh(note)
+    response.headers["ETag"] = note_etag(updated.id, updated.version)
     
     # RAG REFRESH COMMENTED OUT
     # try:
@@ -238,11 +701,11 @@ async def update_note(note_id: int, note_update: NoteUpdateWithVersion, db: Sess
     # except Exception as e:
     #     print(f"Warning: Failed to refresh RAG index: {e}")
     
-    return note
+    return updated
 
 # Legacy update endpoint (for backward compatibility)
 @app.put("/api/notes/{note_id}/simple", response_model=NoteResponse)
-async def update_note_simple(note_id: int, note_update: NoteUpdate, db: Session = Depends(get_db)):
+async def update_note_simple(note_id: int, note_update: NoteUpdate, response: Response, db: Session = Depends(get_db)):
     """Update an existing note (without version control)"""
     note = db.query(Note).filter(Note.id == note_id).first()
     if not note:
@@ -251,23 +714,86 @@ async def update_note_simple(note_id: int, note_update: NoteUpdate, db: Session
     if not note_update.content.strip():
         raise HTTPException(status_code=400, detail="Note content cannot be empty")
     
+    # Still bump the version so ETags change with the content
     note.content = note_update.content.strip()
+    note.version += 1
     note.updated_at = datetime.utcnow()
+    bump_collection_version(db)
     db.commit()
     db.refresh(note)
+    response.headers["ETag"] = note_etag(note.id, note.version)
+    
+    # RAG REFRESH COMMENTED OUT
+    # try:
+    #     rag_service.load_notes_to_vector_store()
+    # except Exception as e:
+    #     print(f"Warning: Failed to refresh RAG index: {e}")
+    
     return note
 
 @app.delete("/api/notes/{note_id}")
-async def delete_note(note_id: int, db: Session = Depends(get_db)):
-    """Delete a note"""
-    note = db.query(Note).filter(Note.id == note_id).first()
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
+async def delete_note(note_id: int, if_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Delete a note (conditional on If-Match when the header is sent)"""
+    stmt = delete(Note).where(Note.id == note_id)
+    if if_match is not None:
+        versions = if_match_versions(if_match, note_id)
+        if versions is not None:
+            stmt = stmt.where(Note.version.in_(versions))
+    
+    result = db.execute(stmt)
+    if result.rowcount == 0:
+        db.rollback()
+        raise_for_missing_or_stale(db, note_id, 412)
     
-    db.delete(note)
+    bump_collection_version(db)
     db.commit()
+    
+    # RAG REFRESH COMMENTED OUT
+    # try:
+    #     rag_service.load_notes_to_vector_store()
+    # except Exception as e:
+    #     print(f"Warning: Failed to refresh RAG index: {e}")
+    
     return {"message": "Note deleted successfully"}
 
+# Admin: profiling captures
+@app.get("/api/admin/profiling", dependencies=[Depends(require_admin)])
+async def get_profiling_settings():
+    """Current sampling settings"""
+    return {"enabled": profiling_state.enabled, "sample_rate": profiling_state.sample_rate}
+
+@app.post("/api/admin/profiling", dependencies=[Depends(require_admin)])
+async def update_profiling_settings(settings: ProfilingSettings):
+    """Turn profiling mode on or off
+    
+    While on, requests with a valid X-Profile-Token are captured, plus a
+    sample_rate fraction of all requests (0 means header-triggered only).
+    """
+    profiling_state.enabled = settings.enabled
+    profiling_state.sample_rate = settings.sample_rate
+    return {"enabled": profiling_state.enabled, "sample_rate": profiling_state.sample_rate}
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """List captured profiles, newest first"""
+    return await run_in_threadpool(profile_store.list)
+
+@app.get("/api/admin/profiles/{capture_id}", dependencies=[Depends(require_admin)])
+async def download_profile(capture_id: str):
+    """Download a capture as folded stacks (flamegraph.pl / speedscope)"""
+    path = profile_store.path(capture_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{capture_id}.folded")
+
+@app.get("/api/admin/profiles/{capture_id}/summary", dependencies=[Depends(require_admin)])
+async def get_profile_summary(capture_id: str):
+    """Request timing and SQL statement timings for a capture"""
+    summary = await run_in_threadpool(profile_store.summary, capture_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return summary
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,242 @@
+# profiling.py
+"""
+On-demand per-request profiling.
+
+An admin turns profiling mode on through the admin endpoint. While it is
+on, a request is captured when it carries X-Profile-Token matching the admin
+token, or when it is picked by the configured sample rate. A background
+thread samples the event loop thread and keeps only the samples where the
+request's own task is running; the rest of the wall time is counted under
+"[awaiting]" (I/O, threadpool work, other requests). SQLAlchemy statement
+timings are recorded alongside. Each capture is written to a bounded ring
+buffer on disk as collapsed stacks (flamegraph.pl / speedscope "folded"
+format) plus a JSON summary.
+
+Nothing is installed unless ADMIN_TOKEN is set. While profiling mode is off
+the middleware only checks one flag, and the SQL hooks are attached to the
+engine only while a capture is running.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_MAX_CAPTURES = int(os.getenv("PROFILE_MAX_CAPTURES", 50))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 5))
+
+CAPTURE_ID_RE = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+# SQL timings for the capture running in the current request context
+_current_sql: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("profile_sql", default=None)
+
+AWAITING_FRAME = "[awaiting]"
+
+class StackSampler(threading.Thread):
+    """Periodically samples one thread's Python stack into folded stacks
+
+    With a loop and task, samples taken while another task (or nothing) is
+    running on the loop are counted as AWAITING_FRAME instead of being
+    attributed to this request.
+    """
+
+    def __init__(self, thread_id: int, interval: float, loop=None, task=None):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.loop = loop
+        self.task = task
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            if self.task is not None and asyncio.current_task(self.loop) is not self.task:
+                self.stacks[AWAITING_FRAME] += 1
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._done.set()
+        self.join()
+        return self.stacks
+
+class ProfileStore:
+    """Ring buffer of captures on disk (oldest removed past max_captures)"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_captures: int = PROFILE_MAX_CAPTURES):
+        self.directory = directory
+        self.max_captures = max_captures
+        os.makedirs(directory, exist_ok=True)
+
+    def _capture_ids(self) -> List[str]:
+        ids = [name[:-5] for name in os.listdir(self.directory) if name.endswith(".json")]
+        return sorted(capture_id for capture_id in ids if CAPTURE_ID_RE.match(capture_id))
+
+    def save(self, stacks: Counter, summary: Dict[str, Any]) -> str:
+        capture_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        summary["id"] = capture_id
+
+        folded = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        with open(os.path.join(self.directory, f"{capture_id}.folded"), "w") as f:
+            f.write(folded)
+        with open(os.path.join(self.directory, f"{capture_id}.json"), "w") as f:
+            json.dump(summary, f)
+
+        for old_id in self._capture_ids()[:-self.max_captures]:
+            for suffix in (".folded", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, old_id + suffix))
+                except FileNotFoundError:
+                    pass
+        return capture_id
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Capture summaries, newest first (SQL statements omitted)"""
+        captures = []
+        for capture_id in reversed(self._capture_ids()):
+            summary = self.summary(capture_id)
+            if summary:
+                summary.pop("sql", None)
+                captures.append(summary)
+        return captures
+
+    def summary(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        path = self.path(capture_id, ".json")
+        if not path:
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def path(self, capture_id: str, suffix: str = ".folded") -> Optional[str]:
+        if not CAPTURE_ID_RE.match(capture_id):
+            return None
+        path = os.path.join(self.directory, capture_id + suffix)
+        return path if os.path.exists(path) else None
+
+class ProfilingState:
+    """Runtime toggle set through the admin endpoint"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.0
+
+profiling_state = ProfilingState()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_sql.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current_sql.get()
+    if timings is not None and conn.info.get("profile_start"):
+        started = conn.info["profile_start"].pop()
+        timings.append({
+            "statement": statement,
+            "duration_ms": (time.perf_counter() - started) * 1000
+        })
+
+class SqlTimer:
+    """Statement timing hooks, attached to the engine only while captures run"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def attach(self):
+        with self._lock:
+            if self.active == 0:
+                event.listen(self.engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(self.engine, "after_cursor_execute", _after_cursor_execute)
+            self.active += 1
+
+    def detach(self):
+        with self._lock:
+            self.active -= 1
+            if self.active == 0:
+                event.remove(self.engine, "before_cursor_execute", _before_cursor_execute)
+                event.remove(self.engine, "after_cursor_execute", _after_cursor_execute)
+
+class ProfilingMiddleware:
+    """ASGI middleware that captures sampled or explicitly requested requests"""
+
+    def __init__(self, app, store: ProfileStore, sql_timer: SqlTimer, token: str,
+                 interval_ms: float = PROFILE_INTERVAL_MS):
+        self.app = app
+        self.store = store
+        self.sql_timer = sql_timer
+        self.token = token.encode()
+        self.interval = interval_ms / 1000
+
+    def _should_profile(self, scope) -> bool:
+        if profiling_state.sample_rate and random.random() < profiling_state.sample_rate:
+            return True
+        for name, value in scope["headers"]:
+            if name == b"x-profile-token":
+                return secrets.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        # Profiling mode off: a single flag check, nothing else
+        if not profiling_state.enabled or scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": None}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        sql_timings = []
+        token = _current_sql.set(sql_timings)
+        self.sql_timer.attach()
+        sampler = StackSampler(threading.get_ident(), self.interval,
+                               asyncio.get_running_loop(), asyncio.current_task())
+        started_at = time.time()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stacks = sampler.stop()
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.sql_timer.detach()
+            _current_sql.reset(token)
+            await run_in_threadpool(self.store.save, stacks, {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "started_at": started_at,
+                "duration_ms": duration_ms,
+                "samples": sum(stacks.values()),
+                "interval_ms": self.interval * 1000,
+                "awaiting_samples": stacks.get(AWAITING_FRAME, 0),
+                "sampling": "request task only; time not spent running this request's task "
+                            "(I/O, threadpool work, other requests) is counted as [awaiting]",
+                "sql_count": len(sql_timings),
+                "sql_ms": sum(t["duration_ms"] for t in sql_timings),
+                "sql": sql_timings
+            })
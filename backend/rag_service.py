@@ -1,286 +1,560 @@
-# # rag_service.py
-# import json
-# import sqlite3
-# from typing import List, Dict, Any
-# from sentence_transformers import SentenceTransformer
-# import numpy as np
-# from sklearn.metrics.pairwise import cosine_similarity
-# import re
-# from datetime import datetime
-
-# class SimpleRAG:
-#     def __init__(self, db_path: str = "./notes.db"):
-#         """Initialize RAG pipeline with local sentence transformer"""
-#         self.db_path = db_path
+# rag_service.py
+import json
+import hashlib
+import os
+import sqlite3
+import tempfile
+import weakref
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from sentence_transformers import SentenceTransformer
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+import re
+from datetime import datetime
+
+class LRUCache:
+    """Small least-recently-used cache that counts hits and misses"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class QuantizedEmbeddings:
+    """Compact embedding store: int8 or float16 codes with precomputed norms.
+
+    int8 codes use a per-dimension scale. When a new batch falls outside the
+    current range, the affected dimensions are widened (with some headroom)
+    and their existing codes re-quantized, so nothing is clipped however the
+    vectors arrive. Candidates are re-ranked with exact float32 cosine
+    similarity read from a per-instance on-disk copy of the original vectors,
+    so only the codes and norms live in RAM.
+    """
+
+    BLOCK_ROWS = 16384
+    SCALE_HEADROOM = 1.25
+    MIN_SCALE = 1e-6
+
+    def __init__(self, dim: int, dtype: str = 'int8', rescore: bool = True, rescore_dir: Optional[str] = None):
+        if dtype not in ('int8', 'float16'):
+            raise ValueError(f"Unsupported quantization dtype: {dtype}")
+        self.dim = dim
+        self.dtype = dtype
+        self.codes = np.empty((0, dim), dtype=np.int8 if dtype == 'int8' else np.float16)
+        self.norms = np.empty(0, dtype=np.float32)
+        self.scale = None
+        self.count = 0
+        self._full_precision = None
+
+        # Float32 side file used for re-ranking; private to this store and
+        # removed once the store is garbage-collected
+        self.rescore_path = None
+        if rescore:
+            fd, self.rescore_path = tempfile.mkstemp(prefix='rag_embeddings_', suffix='.f32', dir=rescore_dir)
+            os.close(fd)
+            weakref.finalize(self, _remove_file, self.rescore_path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        """Resident memory allocated for codes, norms and scales (including spare capacity)"""
+        scale_bytes = self.scale.nbytes if self.scale is not None else 0
+        return self.codes.nbytes + self.norms.nbytes + scale_bytes
+
+    def _widen_scale(self, embeddings: np.ndarray):
+        """Grow per-dimension scales to cover a batch, re-quantizing stored codes"""
+        needed = np.abs(embeddings).max(axis=0) / 127.0
+        if self.scale is None:
+            self.scale = np.maximum(needed, self.MIN_SCALE).astype(np.float32)
+            return
+
+        grow = np.flatnonzero(needed > self.scale)
+        if len(grow) == 0:
+            return
+
+        new_scale = self.scale.copy()
+        new_scale[grow] = needed[grow] * self.SCALE_HEADROOM
+        ratio = self.scale[grow] / new_scale[grow]
+        for start in range(0, self.count, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, self.count)
+            self.codes[start:stop, grow] = np.rint(self.codes[start:stop, grow] * ratio).astype(np.int8)
+        self.scale = new_scale
+
+    def add(self, embeddings: np.ndarray):
+        """Quantize and append a batch of float32 embeddings"""
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim)
+        if len(embeddings) == 0:
+            return
+
+        if self.dtype == 'int8':
+            self._widen_scale(embeddings)
+            codes = np.clip(np.rint(embeddings / self.scale), -127, 127).astype(np.int8)
+        else:
+            codes = embeddings.astype(np.float16)
+
+        # Grow capacity geometrically instead of re-stacking on every add
+        needed = self.count + len(embeddings)
+        if needed > len(self.codes):
+            capacity = max(needed, 2 * len(self.codes), 1024)
+            codes_buf = np.empty((capacity, self.dim), dtype=self.codes.dtype)
+            norms_buf = np.empty(capacity, dtype=np.float32)
+            codes_buf[:self.count] = self.codes[:self.count]
+            norms_buf[:self.count] = self.norms[:self.count]
+            self.codes, self.norms = codes_buf, norms_buf
+
+        self.codes[self.count:needed] = codes
+        self.norms[self.count:needed] = np.linalg.norm(embeddings, axis=1)
+        self.count = needed
+
+        if self.rescore_path:
+            with open(self.rescore_path, 'ab') as f:
+                f.write(embeddings.tobytes())
+            self._full_precision = None
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity against every stored code"""
+        query = query / (np.linalg.norm(query) or 1.0)
+        if self.dtype == 'int8':
+            # Fold the per-dimension scale into the query once per search
+            query = query * self.scale
+
+        # Widen codes block by block into one reusable float32 buffer
+        scores = np.empty(self.count, dtype=np.float32)
+        block = np.empty((min(self.BLOCK_ROWS, self.count), self.dim), dtype=np.float32)
+        for start in range(0, self.count, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, self.count)
+            np.copyto(block[:stop - start], self.codes[start:stop])
+            np.matmul(block[:stop - start], query, out=scores[start:stop])
+
+        norms = self.norms[:self.count]
+        np.divide(scores, norms, out=scores, where=norms > 0)
+        return scores
+
+    def _read_full_precision(self, indices: np.ndarray) -> np.ndarray:
+        if self._full_precision is None or len(self._full_precision) != self.count:
+            self._full_precision = np.memmap(
+                self.rescore_path, dtype=np.float32, mode='r', shape=(self.count, self.dim)
+            )
+        return np.asarray(self._full_precision[indices])
+
+    def search(self, query: np.ndarray, top_k: int = 3, rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (indices, similarities) of the top_k closest vectors"""
+        if self.count == 0 or top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        scores = self._approximate_scores(query)
+
+        n_candidates = min(self.count, top_k * max(rescore_factor, 1))
+        candidates = np.argpartition(scores, -n_candidates)[-n_candidates:]
+
+        if self.rescore_path:
+            candidates = np.sort(candidates)
+            vectors = self._read_full_precision(candidates)
+            norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+            candidate_scores = (vectors @ query) / np.where(norms > 0, norms, 1.0)
+        else:
+            candidate_scores = scores[candidates]
+
+        order = np.argsort(candidate_scores)[::-1][:top_k]
+        return candidates[order], candidate_scores[order].astype(np.float32)
+
+class SimpleRAG:
+    LOAD_BATCH_SIZE = 1024
+
+    def __init__(self, db_path: str = "./notes.db", quantization: Optional[str] = None,
+                 rescore_dir: Optional[str] = None, cache_size: int = 1024):
+        """Initialize RAG pipeline with local sentence transformer
+
+        quantization: None keeps dense float32 embeddings; 'int8' or 'float16'
+        stores compact codes and re-ranks candidates from a float32 file
+        created in rescore_dir (the system temp dir by default).
+        cache_size: entries kept in the query embedding and result caches
+        (0 disables caching).
+        """
+        self.db_path = db_path
+        self.quantization = quantization
+        self.rescore_dir = rescore_dir
+        
+        # Two-level search cache: normalized query -> embedding, and
+        # (embedding hash, top_k, generation) -> ranked results.
+        # Every index mutation bumps the generation so stale results are never served.
+        self.generation = 0
+        self.embedding_cache = LRUCache(cache_size)
+        self.results_cache = LRUCache(cache_size)
         
-#         # Use a small, efficient sentence transformer model (no API key needed)
-#         # This model works offline and is free
-#         self.embeddings_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Use a small, efficient sentence transformer model (no API key needed)
+        # This model works offline and is free
+        self.embeddings_model = SentenceTransformer('all-MiniLM-L6-v2')
         
-#         # Simple in-memory vector store
-#         self.vector_store = {
-#             'embeddings': [],
-#             'documents': [],
-#             'metadata': []
-#         }
+        # Simple in-memory vector store
+        self.vector_store = {
+            'embeddings': self._new_embedding_store(),
+            'documents': [],
+            'metadata': []
+        }
         
-#         # Initialize and load existing notes
-#         self.load_notes_to_vector_store()
+        # Initialize and load existing notes
+        self.load_notes_to_vector_store()
     
-#     def chunk_text(self, text: str, chunk_size: int = 200) -> List[str]:
-#         """Simple text chunking by sentence and character limit"""
-#         # Split by sentences first
-#         sentences = re.split(r'[.!?]+', text)
-#         chunks = []
-#         current_chunk = ""
+    def chunk_text(self, text: str, chunk_size: int = 200) -> List[str]:
+        """Simple text chunking by sentence and character limit"""
+        # Split by sentences first
+        sentences = re.split(r'[.!?]+', text)
+        chunks = []
+        current_chunk = ""
         
-#         for sentence in sentences:
-#             sentence = sentence.strip()
-#             if not sentence:
-#                 continue
+        for sentence in sentences:
+            sentence = sentence.strip()
+            if not sentence:
+                continue
                 
-#             # If adding this sentence exceeds chunk size, start new chunk
-#             if len(current_chunk) + len(sentence) > chunk_size and current_chunk:
-#                 chunks.append(current_chunk.strip())
-#                 current_chunk = sentence
-#             else:
-#                 current_chunk += " " + sentence if current_chunk else sentence
+            # If adding this sentence exceeds chunk size, start new chunk
+            if len(current_chunk) + len(sentence) > chunk_size and current_chunk:
+                chunks.append(current_chunk.strip())
+                current_chunk = sentence
+            else:
+                current_chunk += " " + sentence if current_chunk else sentence
         
-#         # Add remaining chunk
-#         if current_chunk.strip():
-#             chunks.append(current_chunk.strip())
+        # Add remaining chunk
+        if current_chunk.strip():
+            chunks.append(current_chunk.strip())
         
-#         # If no chunks created (very short text), return original text
-#         return chunks if chunks else [text]
+        # If no chunks created (very short text), return original text
+        return chunks if chunks else [text]
     
-#     def create_embeddings(self, texts: List[str]) -> np.ndarray:
-#         """Generate embeddings using sentence transformers"""
-#         return self.embeddings_model.encode(texts)
+    def _new_embedding_store(self):
+        """Empty embedding container for the configured precision"""
+        if self.quantization:
+            dim = self.embeddings_model.get_sentence_embedding_dimension()
+            return QuantizedEmbeddings(dim, self.quantization, rescore_dir=self.rescore_dir)
+        return []
     
-#     def load_notes_to_vector_store(self):
-#         """Load all notes from database into vector store"""
-#         try:
-#             conn = sqlite3.connect(self.db_path)
-#             cursor = conn.cursor()
-            
-#             cursor.execute("""
-#                 SELECT id, content, created_at, updated_at, version 
-#                 FROM notes 
-#                 ORDER BY created_at DESC
-#             """)
+    def create_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings using sentence transformers"""
+        return self.embeddings_model.encode(texts)
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Canonical cache form of a query (the model is uncased)"""
+        return " ".join(query.lower().split())
+    
+    def _embed_query(self, query: str):
+        """Return (embedding, embedding hash) for a query, using the LRU cache"""
+        key = self.normalize_query(query)
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        embedding = self.create_embeddings([key])
+        cached = (embedding, hashlib.sha1(embedding.tobytes()).hexdigest())
+        self.embedding_cache.put(key, cached)
+        return cached
+    
+    def _bump_generation(self):
+        """Invalidate cached results after the index changes"""
+        self.generation += 1
+        self.results_cache.clear()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit rates for both search cache levels"""
+        return {
+            'generation': self.generation,
+            'embeddings': self.embedding_cache.stats(),
+            'results': self.results_cache.stats()
+        }
+    
+    def load_notes_to_vector_store(self):
+        """Load all notes from database into vector store"""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
             
-#             notes = cursor.fetchall()
-#             conn.close()
+            cursor.execute("""
+                SELECT id, content, created_at, updated_at, version 
+                FROM notes 
+                ORDER BY created_at DESC
+            """)
             
-#             # Clear existing vector store
-#             self.vector_store = {
-#                 'embeddings': [],
-#                 'documents': [],
-#                 'metadata': []
-#             }
+            notes = cursor.fetchall()
+            conn.close()
             
-#             all_chunks = []
-#             all_metadata = []
+            all_chunks = []
+            all_metadata = []
             
-#             for note_id, content, created_at, updated_at, version in notes:
-#                 # Chunk the note content
-#                 chunks = self.chunk_text(content)
+            for note_id, content, created_at, updated_at, version in notes:
+                # Chunk the note content
+                chunks = self.chunk_text(content)
                 
-#                 for i, chunk in enumerate(chunks):
-#                     all_chunks.append(chunk)
-#                     all_metadata.append({
-#                         'note_id': note_id,
-#                         'chunk_index': i,
-#                         'created_at': created_at,
-#                         'updated_at': updated_at,
-#                         'version': version,
-#                         'full_content': content[:100] + "..." if len(content) > 100 else content
-#                     })
+                for i, chunk in enumerate(chunks):
+                    all_chunks.append(chunk)
+                    all_metadata.append({
+                        'note_id': note_id,
+                        'chunk_index': i,
+                        'created_at': created_at,
+                        'updated_at': updated_at,
+                        'version': version,
+                        'full_content': content[:100] + "..." if len(content) > 100 else content
+                    })
             
-#             if all_chunks:
-#                 # Generate embeddings for all chunks
-#                 embeddings = self.create_embeddings(all_chunks)
-                
-#                 self.vector_store['embeddings'] = embeddings
-#                 self.vector_store['documents'] = all_chunks
-#                 self.vector_store['metadata'] = all_metadata
+            # Build the new store completely before replacing the old one
+            embeddings = self._new_embedding_store()
+            if all_chunks:
+                if self.quantization:
+                    # Encode in batches so peak RAM never holds the full float32 matrix
+                    for start in range(0, len(all_chunks), self.LOAD_BATCH_SIZE):
+                        embeddings.add(self.create_embeddings(all_chunks[start:start + self.LOAD_BATCH_SIZE]))
+                else:
+                    # Generate embeddings for all chunks
+                    embeddings = self.create_embeddings(all_chunks)
+            
+            self.vector_store = {
+                'embeddings': embeddings,
+                'documents': all_chunks,
+                'metadata': all_metadata
+            }
+            self._bump_generation()
             
-#             print(f"✅ Loaded {len(all_chunks)} chunks from {len(notes)} notes into vector store")
+            print(f"✅ Loaded {len(all_chunks)} chunks from {len(notes)} notes into vector store")
             
-#         except Exception as e:
-#             print(f"❌ Error loading notes: {e}")
+        except Exception as e:
+            print(f"❌ Error loading notes: {e}")
     
-#     def add_note_to_vector_store(self, note_id: int, content: str, created_at: str, updated_at: str, version: int):
-#         """Add a new note to the vector store"""
-#         chunks = self.chunk_text(content)
+    def add_note_to_vector_store(self, note_id: int, content: str, created_at: str, updated_at: str, version: int):
+        """Add a new note to the vector store"""
+        chunks = self.chunk_text(content)
         
-#         for i, chunk in enumerate(chunks):
-#             # Create embedding for this chunk
-#             embedding = self.create_embeddings([chunk])[0]
+        for i, chunk in enumerate(chunks):
+            # Create embedding for this chunk
+            embedding = self.create_embeddings([chunk])[0]
             
-#             # Add to vector store
-#             if len(self.vector_store['embeddings']) == 0:
-#                 self.vector_store['embeddings'] = embedding.reshape(1, -1)
-#             else:
-#                 self.vector_store['embeddings'] = np.vstack([
-#                     self.vector_store['embeddings'], 
-#                     embedding.reshape(1, -1)
-#                 ])
+            # Add to vector store
+            if self.quantization:
+                self.vector_store['embeddings'].add(embedding.reshape(1, -1))
+            elif len(self.vector_store['embeddings']) == 0:
+                self.vector_store['embeddings'] = embedding.reshape(1, -1)
+            else:
+                self.vector_store['embeddings'] = np.vstack([
+                    self.vector_store['embeddings'], 
+                    embedding.reshape(1, -1)
+                ])
             
-#             self.vector_store['documents'].append(chunk)
-#             self.vector_store['metadata'].append({
-#                 'note_id': note_id,
-#                 'chunk_index': i,
-#                 'created_at': created_at,
-#                 'updated_at': updated_at,
-#                 'version': version,
-#                 'full_content': content[:100] + "..." if len(content) > 100 else content
-#             })
-    
-#     def retrieve_similar_notes(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-#         """Retrieve similar notes based on query"""
-#         if len(self.vector_store['documents']) == 0:
-#             return []
+            self.vector_store['documents'].append(chunk)
+            self.vector_store['metadata'].append({
+                'note_id': note_id,
+                'chunk_index': i,
+                'created_at': created_at,
+                'updated_at': updated_at,
+                'version': version,
+                'full_content': content[:100] + "..." if len(content) > 100 else content
+            })
         
-#         # Create embedding for query
-#         query_embedding = self.create_embeddings([query])
+        self._bump_generation()
+    
+    def retrieve_similar_notes(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Retrieve similar notes based on query"""
+        return self._cached_retrieval(query, top_k)['docs']
+    
+    def _cached_retrieval(self, query: str, top_k: int) -> Dict[str, Any]:
+        """Ranked results for a query, shared through the results cache"""
+        query_embedding, embedding_hash = self._embed_query(query)
+        key = (embedding_hash, top_k, self.generation)
         
-#         # Calculate cosine similarity
-#         similarities = cosine_similarity(
-#             query_embedding, 
-#             self.vector_store['embeddings']
-#         )[0]
+        entry = self.results_cache.get(key)
+        if entry is None:
+            entry = {'docs': self._rank_documents(query_embedding, top_k), 'response': None}
+            self.results_cache.put(key, entry)
+        return entry
+    
+    def _rank_documents(self, query_embedding: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Score the query embedding against the vector store"""
+        if len(self.vector_store['documents']) == 0:
+            return []
         
-#         # Get top-k most similar chunks
-#         top_indices = np.argsort(similarities)[::-1][:top_k]
+        if self.quantization:
+            # Approximate scan over quantized codes, exact float32 re-rank
+            top_indices, top_scores = self.vector_store['embeddings'].search(query_embedding[0], top_k)
+        else:
+            # Calculate cosine similarity
+            similarities = cosine_similarity(
+                query_embedding, 
+                self.vector_store['embeddings']
+            )[0]
+            
+            # Get top-k most similar chunks
+            top_indices = np.argsort(similarities)[::-1][:top_k]
+            top_scores = similarities[top_indices]
         
-#         results = []
-#         for idx in top_indices:
-#             results.append({
-#                 'content': self.vector_store['documents'][idx],
-#                 'similarity_score': float(similarities[idx]),
-#                 'metadata': self.vector_store['metadata'][idx]
-#             })
+        results = []
+        for idx, score in zip(top_indices, top_scores):
+            results.append({
+                'content': self.vector_store['documents'][idx],
+                'similarity_score': float(score),
+                'metadata': self.vector_store['metadata'][idx]
+            })
         
-#         return results
+        return results
     
-#     def generate_response(self, query: str, retrieved_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
-#         """Simple response generation based on retrieved documents"""
-#         if not retrieved_docs:
-#             return {
-#                 'response': "No relevant notes found for your query.",
-#                 'sources': [],
-#                 'context_used': []
-#             }
+    def generate_response(self, query: str, retrieved_docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Simple response generation based on retrieved documents"""
+        if not retrieved_docs:
+            return {
+                'response': "No relevant notes found for your query.",
+                'sources': [],
+                'context_used': []
+            }
         
-#         # Simple prompt template
-#         context_chunks = []
-#         sources = []
+        # Simple prompt template
+        context_chunks = []
+        sources = []
         
-#         for doc in retrieved_docs:
-#             context_chunks.append(f"- {doc['content']}")
-#             sources.append({
-#                 'note_id': doc['metadata']['note_id'],
-#                 'similarity': doc['similarity_score'],
-#                 'preview': doc['metadata']['full_content']
-#             })
+        for doc in retrieved_docs:
+            context_chunks.append(f"- {doc['content']}")
+            sources.append({
+                'note_id': doc['metadata']['note_id'],
+                'similarity': doc['similarity_score'],
+                'preview': doc['metadata']['full_content']
+            })
         
-#         context = "\n".join(context_chunks)
+        context = "\n".join(context_chunks)
         
-#         # Simple rule-based response generation (no LLM needed)
-#         response = self._generate_simple_response(query, context, retrieved_docs)
+        # Simple rule-based response generation (no LLM needed)
+        response = self._generate_simple_response(query, context, retrieved_docs)
         
-#         return {
-#             'response': response,
-#             'sources': sources,
-#             'context_used': context_chunks,
-#             'query': query,
-#             'timestamp': datetime.now().isoformat()
-#         }
+        return {
+            'response': response,
+            'sources': sources,
+            'context_used': context_chunks,
+            'query': query,
+            'timestamp': datetime.now().isoformat()
+        }
     
-#     def _generate_simple_response(self, query: str, context: str, docs: List[Dict]) -> str:
-#         """Simple rule-based response generation"""
-#         query_lower = query.lower()
+    def _generate_simple_response(self, query: str, context: str, docs: List[Dict]) -> str:
+        """Simple rule-based response generation"""
+        query_lower = query.lower()
         
-#         # Count relevant documents
-#         num_results = len(docs)
-#         avg_similarity = sum(doc['similarity_score'] for doc in docs) / len(docs)
+        # Count relevant documents
+        num_results = len(docs)
+        avg_similarity = sum(doc['similarity_score'] for doc in docs) / len(docs)
         
-#         if avg_similarity > 0.7:
-#             confidence = "high"
-#         elif avg_similarity > 0.5:
-#             confidence = "moderate"
-#         else:
-#             confidence = "low"
+        if avg_similarity > 0.7:
+            confidence = "high"
+        elif avg_similarity > 0.5:
+            confidence = "moderate"
+        else:
+            confidence = "low"
         
-#         # Generate response based on patterns
-#         if any(word in query_lower for word in ['find', 'search', 'look', 'show']):
-#             response = f"I found {num_results} relevant notes with {confidence} confidence matching your search."
-#         elif any(word in query_lower for word in ['what', 'how', 'why', 'when']):
-#             response = f"Based on your notes, here's what I found: {num_results} related entries with {confidence} relevance."
-#         else:
-#             response = f"Here are {num_results} notes related to your query (confidence: {confidence})."
+        # Generate response based on patterns
+        if any(word in query_lower for word in ['find', 'search', 'look', 'show']):
+            response = f"I found {num_results} relevant notes with {confidence} confidence matching your search."
+        elif any(word in query_lower for word in ['what', 'how', 'why', 'when']):
+            response = f"Based on your notes, here's what I found: {num_results} related entries with {confidence} relevance."
+        else:
+            response = f"Here are {num_results} notes related to your query (confidence: {confidence})."
         
-#         # Add top result preview
-#         if docs and docs[0]['similarity_score'] > 0.3:
-#             top_content = docs[0]['content'][:150]
-#             response += f"\n\nMost relevant excerpt: \"{top_content}...\""
+        # Add top result preview
+        if docs and docs[0]['similarity_score'] > 0.3:
+            top_content = docs[0]['content'][:150]
+            response += f"\n\nMost relevant excerpt: \"{top_content}...\""
         
-#         return response
+        return response
     
-#     def search_notes(self, query: str, top_k: int = 3) -> Dict[str, Any]:
-#         """Main RAG pipeline function"""
-#         try:
-#             # Step 1: Retrieve similar documents
-#             retrieved_docs = self.retrieve_similar_notes(query, top_k)
+    def search_notes(self, query: str, top_k: int = 3) -> Dict[str, Any]:
+        """Main RAG pipeline function"""
+        try:
+            # Step 1: Retrieve similar documents (cached per index generation)
+            entry = self._cached_retrieval(query, top_k)
+            
+            # Step 2: Generate response, built once per cache entry
+            if entry['response'] is None:
+                entry['response'] = self.generate_response(query, entry['docs'])
             
-#             # Step 2: Generate response
-#             response = self.generate_response(query, retrieved_docs)
+            response = dict(entry['response'])
+            response['query'] = query
+            response['timestamp'] = datetime.now().isoformat()
             
-#             return {
-#                 'success': True,
-#                 'data': response
-#             }
+            return {
+                'success': True,
+                'data': response
+            }
             
-#         except Exception as e:
-#             return {
-#                 'success': False,
-#                 'error': str(e),
-#                 'data': None
-#             }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e),
+                'data': None
+            }
     
-#     def evaluate_retrieval(self, query: str, expected_note_ids: List[int], top_k: int = 3) -> Dict[str, float]:
-#         """Simple evaluation metric for retrieval quality"""
-#         results = self.retrieve_similar_notes(query, top_k)
+    def evaluate_retrieval(self, query: str, expected_note_ids: List[int], top_k: int = 3) -> Dict[str, float]:
+        """Simple evaluation metric for retrieval quality"""
+        results = self.retrieve_similar_notes(query, top_k)
         
-#         retrieved_note_ids = [doc['metadata']['note_id'] for doc in results]
+        retrieved_note_ids = [doc['metadata']['note_id'] for doc in results]
         
-#         # Precision: How many retrieved docs are relevant?
-#         relevant_retrieved = len(set(retrieved_note_ids) & set(expected_note_ids))
-#         precision = relevant_retrieved / len(retrieved_note_ids) if retrieved_note_ids else 0
+        # Precision: How many retrieved docs are relevant?
+        relevant_retrieved = len(set(retrieved_note_ids) & set(expected_note_ids))
+        precision = relevant_retrieved / len(retrieved_note_ids) if retrieved_note_ids else 0
         
-#         # Recall: How many relevant docs were retrieved?
-#         recall = relevant_retrieved / len(expected_note_ids) if expected_note_ids else 0
+        # Recall: How many relevant docs were retrieved?
+        recall = relevant_retrieved / len(expected_note_ids) if expected_note_ids else 0
         
-#         # F1 Score
-#         f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
+        # F1 Score
+        f1 = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
         
-#         return {
-#             'precision': precision,
-#             'recall': recall,
-#             'f1_score': f1,
-#             'retrieved_count': len(retrieved_note_ids),
-#             'expected_count': len(expected_note_ids)
-#         }
-
-# # Example usage and testing
-# if __name__ == "__main__":
-#     # Initialize RAG pipeline
-#     rag = SimpleRAG()
+        return {
+            'precision': precision,
+            'recall': recall,
+            'f1_score': f1,
+            'retrieved_count': len(retrieved_note_ids),
+            'expected_count': len(expected_note_ids)
+        }
+
+# Example usage and testing
+if __name__ == "__main__":
+    # Initialize RAG pipeline
+    rag = SimpleRAG()
     
-#     # Test search
-#     test_query = "meeting notes"
-#     result = rag.search_notes(test_query)
+    # Test search
+    test_query = "meeting notes"
+    result = rag.search_notes(test_query)
     
-#     print(f"Query: {test_query}")
-#     print(f"Result: {json.dumps(result, indent=2)}")
\ No newline at end of file
+    print(f"Query: {test_query}")
+    print(f"Result: {json.dumps(result, indent=2)}")
\ No newline at end of file
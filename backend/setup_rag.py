@@ -100,12 +100,12 @@
 #             "Recipe for chocolate cake with vanilla frosting and berries"
 #         ]
         
-#         # Insert sample notes
-#         for note_content in sample_notes:
-#             cursor.execute('''
-#                 INSERT INTO notes (content, created_at, updated_at, version)
-#                 VALUES (?, ?, ?, ?)
-#             ''', (note_content, datetime.now(), datetime.now(), 1))
+#         # Insert sample notes in one batch
+#         now = datetime.now()
+#         cursor.executemany('''
+#             INSERT INTO notes (content, created_at, updated_at, version)
+#             VALUES (?, ?, ?, ?)
+#         ''', [(note_content, now, now, 1) for note_content in sample_notes])
         
 #         conn.commit()
 #         conn.close()
@@ -1,26 +1,43 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import './ShareModal.css';
 
+// const API_BASE = 'http://localhost:8000/api';
+const API_BASE = 'https://namekart-intern-production.up.railway.app/api';
+
 function ShareModal({ note, isOpen, onClose }) {
   const [copied, setCopied] = useState(false);
+  const [shareLink, setShareLink] = useState('');
+  const [error, setError] = useState('');
 
-  if (!isOpen || !note) return null;
+  // Snapshot the note on the server and build a short link to it
+  useEffect(() => {
+    if (!isOpen || !note) return;
+
+    let cancelled = false;
+    setShareLink('');
+    setError('');
+    axios.post(`${API_BASE}/notes/${note.id}/share`)
+      .then((response) => {
+        if (!cancelled) {
+          setShareLink(`${window.location.origin}/share/${response.data.share_id}`);
+        }
+      })
+      .catch((err) => {
+        if (!cancelled) {
+          setError('Error creating share link: ' + (err.response?.data?.detail || err.message));
+        }
+      });
 
-  // Generate shareable link by encoding note data in base64
-  const generateShareLink = () => {
-    const noteData = {
-      id: note.id,
-      content: note.content,
-      created_at: note.created_at,
-      version: note.version
+    return () => {
+      cancelled = true;
     };
-    const encodedData = btoa(JSON.stringify(noteData));
-    return `${window.location.origin}/share/${encodedData}`;
-  };
+  }, [isOpen, note]);
 
-  const shareLink = generateShareLink();
+  if (!isOpen || !note) return null;
 
   const copyToClipboard = async () => {
+    if (!shareLink) return;
     try {
       await navigator.clipboard.writeText(shareLink);
       setCopied(true);
@@ -80,12 +97,13 @@ function ShareModal({ note, isOpen, onClose }) {
             <div className="share-link-container">
               <input 
                 type="text" 
-                value={shareLink} 
+                value={shareLink || error || 'Creating link...'} 
                 readOnly 
                 className="share-link-input"
               />
               <button 
                 onClick={copyToClipboard}
+                disabled={!shareLink}
                 className={`copy-btn ${copied ? 'copied' : ''}`}
               >
                 {copied ? '✓ Copied!' : '📋 Copy'}
@@ -96,20 +114,20 @@ function ShareModal({ note, isOpen, onClose }) {
           <div className="share-options">
             <h3>Share via:</h3>
             <div className="share-buttons">
-              <button onClick={shareViaEmail} className="share-btn email-btn">
+              <button onClick={shareViaEmail} disabled={!shareLink} className="share-btn email-btn">
                 📧 Email
               </button>
-              <button onClick={shareViaWhatsApp} className="share-btn whatsapp-btn">
+              <button onClick={shareViaWhatsApp} disabled={!shareLink} className="share-btn whatsapp-btn">
                 💬 WhatsApp
               </button>
-              <button onClick={shareViaTwitter} className="share-btn twitter-btn">
+              <button onClick={shareViaTwitter} disabled={!shareLink} className="share-btn twitter-btn">
                 🐦 Twitter
               </button>
             </div>
           </div>
           
           <div className="share-info">
-            <p>⚠️ <strong>Note:</strong> This link contains the note content and can be accessed by anyone who has it. The shared note is a snapshot and won't update if you modify the original.</p>
+            <p>⚠️ <strong>Note:</strong> Anyone with this link can view the note. The shared note is a snapshot and won't update if you modify the original.</p>
           </div>
         </div>
         
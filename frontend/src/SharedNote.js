@@ -1,7 +1,21 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
+import axios from 'axios';
 import './SharedNote.css';
 
+// const API_BASE = 'http://localhost:8000/api';
+const API_BASE = 'https://namekart-intern-production.up.railway.app/api';
+
+// Links created before server-side sharing carried the note as base64 JSON
+const decodeLegacyShare = (shareId) => {
+  try {
+    const noteData = JSON.parse(atob(shareId));
+    return noteData && typeof noteData.content === 'string' ? noteData : null;
+  } catch (err) {
+    return null;
+  }
+};
+
 function SharedNote() {
   const { shareId } = useParams();
   const [note, setNote] = useState(null);
@@ -9,15 +23,31 @@ function SharedNote() {
   const [error, setError] = useState('');
 
   useEffect(() => {
-    // Decode the shared note from the URL parameter
-    try {
-      const decodedData = atob(shareId);
-      const noteData = JSON.parse(decodedData);
-      setNote(noteData);
-    } catch (err) {
-      setError('Invalid share link or corrupted data');
+    // Fetch the immutable snapshot (served with long-lived cache headers)
+    const legacyNote = decodeLegacyShare(shareId);
+    if (legacyNote) {
+      setNote(legacyNote);
+      setLoading(false);
+      return;
     }
-    setLoading(false);
+
+    let cancelled = false;
+    axios.get(`${API_BASE}/share/${shareId}`)
+      .then((response) => {
+        if (!cancelled) setNote(response.data);
+      })
+      .catch((err) => {
+        if (!cancelled) {
+          setError(err.response?.status === 404 ? 'This shared note does not exist' : 'Unable to load shared note');
+        }
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+
+    return () => {
+      cancelled = true;
+    };
   }, [shareId]);
 
   const formatDate = (dateString) => {